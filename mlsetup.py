@@ -1,21 +1,28 @@
 #!/usr/bin/python3
+import collections
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
 import shutil
-import socket
 import subprocess
 import sys
-import urllib.request
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import click
-import dotenv
 
-logging.basicConfig(level=logging.DEBUG, format="%(levelname)s: %(message)s")
+# dotenv, socket and http.client are imported lazily inside the functions that
+# need them, to keep the CLI cold start lean for commands that dont (get, etc.)
+
 is_dummy_mode = os.environ.get("DUMMY_MODE", "")
 default_env_file = "~/.mlrun.env"
+tag_cache_file = "~/.mlrun.tag-cache"
+tag_cache_ttl = 600  # seconds before the cached latest tag is revalidated
 scaled_deplyoments = [
     "mlrun-api-chief",
     "mlrun-db",
@@ -37,15 +44,70 @@ valid_registry_args = [
 ]
 docker_services = ["jupyter", "milvus", "mysql"]
 k8s_services = ["spark", "monitoring", "jupyter", "pipelines"]
+# helm chart name per optional service (keyed by the full service name,
+# _partial_match resolves user abbreviations to it first)
 service_map = {
-    "s": "spark-operator",
-    "m": "kube-prometheus-stack",
-    "j": "jupyterNotebook",
-    "p": "pipelines",
+    "spark": "spark-operator",
+    "monitoring": "kube-prometheus-stack",
+    "jupyter": "jupyterNotebook",
+    "pipelines": "pipelines",
 }
+_k8s_services_set = frozenset(k8s_services)
 # auto detect if running inside GitHub Codespaces
 is_codespaces = "CODESPACES" in os.environ and "CODESPACE_NAME" in os.environ
 
+# cache parsed .env files by (path, mtime) so the multiple config objects
+# built in a single CLI invocation dont re-parse the same file
+_env_cache = {}
+
+# cache is_supported() probe results (kubectl version, docker ps) so the
+# auto-detect flow doesnt spawn the same probe subprocesses twice per run
+_probe_cache = {}
+
+# cache kubectl resource existence checks per (resource, name, namespace),
+# entries are invalidated when this process creates/deletes the resource
+_k8s_resource_cache = {}
+
+
+# translation table for CLI option names (--some-key -> some_key), translate
+# runs the conversion in C instead of a python-level scan per key
+_dash_to_underscore = str.maketrans("-", "_")
+
+# deployments tracked by the scale/pause status checks
+_scaled_deployment_re = re.compile(r"nuclio|mlrun|mpi")
+
+# image references in rendered helm manifests (for pre-pulling)
+_image_re = re.compile(r"image:\s*[\"']?([^\"'\s]+)")
+
+# windows drive prefix (c:\...) that needs conversion to docker style
+_win_drive_re = re.compile(r"^[a-zA-Z]:\\.?")
+
+
+@functools.lru_cache(maxsize=32)
+def _which(executable):
+    # PATH doesnt change during a CLI run, skip repeated directory scans
+    return shutil.which(executable)
+
+
+@functools.lru_cache(maxsize=1)
+def _k8s_api():
+    # the optional kubernetes python client answers read calls in-process
+    # over a pooled api-server connection, much cheaper than forking
+    # kubectl; return None (and let callers fall back to kubectl) when the
+    # package is not installed or no kubeconfig is available
+    try:
+        from kubernetes import client, config
+    except ImportError:
+        return None
+    try:
+        config.load_kube_config()
+    except Exception:
+        try:
+            config.load_incluster_config()
+        except Exception:
+            return None
+    return client
+
 
 class K8sStages:
     none = 0
@@ -78,9 +140,15 @@ foreground_opt = click.option(
 
 
 @click.group()
-def main():
+@click.option("--verbose", "-v", is_flag=True, help="verbose log")
+def main(verbose):
     """MLRun configuration utility"""
-    pass
+    # progress messages are logged at INFO, debug chatter (including from
+    # third party libs) only shows up with mlsetup -v <command>
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
 
 
 @main.command(context_settings=dict(ignore_unknown_options=True, allow_extra_args=True))
@@ -103,19 +171,16 @@ def start(
     simulate,
 ):
     """Start MLRun service, auto detect the best method (local/docker/k8s/remote)"""
-    extra_args = {}
-    for i in range(0, len(ctx.args), 2):
-        if str(ctx.args[i]).startswith("--"):
-            key = ctx.args[i][2:].replace("-", "_")
-            value = ctx.args[i + 1]
-            if key in extra_args.keys():
-                current_val = extra_args[key]
-                value = (
-                    current_val + [value]
-                    if isinstance(current_val, list)
-                    else [current_val, value]
-                )
-            extra_args[key] = value
+    # accumulate repeated --key value pairs into lists, then unwrap singletons
+    accumulated = collections.defaultdict(list)
+    args_iter = iter(ctx.args)
+    for key, value in zip(args_iter, args_iter):
+        if str(key).startswith("--"):
+            accumulated[key[2:].translate(_dash_to_underscore)].append(value)
+    extra_args = {
+        key: values if len(values) > 1 else values[0]
+        for key, values in accumulated.items()
+    }
 
     config = BaseConfig(env_file, verbose, env_vars_opt=env_vars, simulate=simulate)
     current_env_vars = config.get_env()
@@ -130,6 +195,14 @@ def start(
         return
 
     logging.info(extra_args)
+    if not force_local and last_deployment in ("kubernetes", "docker"):
+        # the last deployment mode is recorded in the env file, try it first
+        # and skip probing the other modes
+        config = deployment_modes[last_deployment].from_config(config)
+        if config.is_supported():
+            config.start(tag=tag, **extra_args)
+            return
+
     config = K8sConfig.from_config(config)
     if config.is_supported():
         config.start(tag=tag, **extra_args)
@@ -159,15 +232,14 @@ def start(
 @click.option("--verbose", "-v", is_flag=True, help="verbose log")
 def stop(env_file, deployment, cleanup, force, verbose):
     """Stop MLRun service which was started using this CLI"""
-    deployment = deployment or BaseConfig(env_file).get_env().get(
-        "MLRUN_CONF_LAST_DEPLOYMENT", ""
-    )
+    base = BaseConfig(env_file, verbose)
+    deployment = deployment or base.get_env().get("MLRUN_CONF_LAST_DEPLOYMENT", "")
     if not deployment:
         logging.error(
             "cannot determine current deployment type, please specify the -d option"
         )
         return
-    config = deployment_modes[deployment](env_file, verbose)
+    config = deployment_modes[deployment].from_config(base)
     config.stop(force, cleanup)
 
 
@@ -180,15 +252,14 @@ def stop(env_file, deployment, cleanup, force, verbose):
 @click.option("--verbose", "-v", is_flag=True, help="verbose log")
 def uninstall(env_file, deployment, force, verbose):
     """Uninstall and cleanup MLRun service which was started using this CLI"""
-    deployment = deployment or BaseConfig(env_file).get_env().get(
-        "MLRUN_CONF_LAST_DEPLOYMENT", ""
-    )
+    base = BaseConfig(env_file, verbose)
+    deployment = deployment or base.get_env().get("MLRUN_CONF_LAST_DEPLOYMENT", "")
     if not deployment:
         logging.error(
             "cannot determine current deployment type, please specify the -d option"
         )
         return
-    config = deployment_modes[deployment](env_file, verbose)
+    config = deployment_modes[deployment].from_config(base)
     config.stop(force, True)
 
 
@@ -202,13 +273,12 @@ def pause(env_file, deployment):
     Plese note -
     if you want to keep your notebooks between deployments scale save your notebooks in the data folder
     """
-    deployment = deployment or BaseConfig(env_file).get_env().get(
-        "MLRUN_CONF_LAST_DEPLOYMENT", ""
-    )
+    base = BaseConfig(env_file)
+    deployment = deployment or base.get_env().get("MLRUN_CONF_LAST_DEPLOYMENT", "")
     if not deployment:
         print("cannot determine current deployment type, please specify the -d option")
         return
-    config = deployment_modes[deployment](env_file)
+    config = deployment_modes[deployment].from_config(base)
     config.pause()
 
 
@@ -227,13 +297,12 @@ def pause(env_file, deployment):
 )
 def scale(env_file, services, deployment):
     """Scale up MLRun deployments"""
-    deployment = deployment or BaseConfig(env_file).get_env().get(
-        "MLRUN_CONF_LAST_DEPLOYMENT", ""
-    )
+    base = BaseConfig(env_file)
+    deployment = deployment or base.get_env().get("MLRUN_CONF_LAST_DEPLOYMENT", "")
     if not deployment:
         print("cannot determine current deployment type, please specify the -d option")
         return
-    config = deployment_modes[deployment](env_file)
+    config = deployment_modes[deployment].from_config(base)
     services = _list2dict(services, default_value="1")
     config.scale(services)
 
@@ -417,6 +486,18 @@ def remote(url, username, access_key, artifact_path, env_file, env_vars, verbose
     default="",
     help="deploy Jupyter container, can provide jupyter image as argument",
 )
+@click.option(
+    "--pre-pull",
+    is_flag=True,
+    help="pull the chart container images in parallel before helm install",
+)
+@click.option(
+    "--async",
+    "async_install",
+    is_flag=True,
+    help="dont wait for the services to become ready, return once helm "
+    "submitted the install",
+)
 def kubernetes(
     name,
     namespace,
@@ -433,6 +514,8 @@ def kubernetes(
     chart_ver,
     values_file_path,
     jupyter,
+    pre_pull,
+    async_install,
 ):
     """Install MLRun service on Kubernetes"""
     config = K8sConfig(env_file, verbose, env_vars_opt=env_vars, simulate=simulate)
@@ -451,6 +534,8 @@ def kubernetes(
         chart_ver,
         values_file_path,
         jupyter,
+        pre_pull,
+        async_install,
     )
 
 
@@ -501,9 +586,18 @@ def clear(env_file):
 
 
 @main.command()
-def latest():
+@click.option(
+    "--refresh-tag", is_flag=True, help="ignore the cached tag and re-fetch it"
+)
+def latest(refresh_tag):
     """Get the latest MLRun version"""
-    get_latest_mlrun_tag()
+    if refresh_tag:
+        clear_mlrun_tag_cache()
+    tag = get_latest_mlrun_tag()
+    if not tag:
+        print("cant detect the latest MLRun version")
+        raise SystemExit(1)
+    print(f"latest MLRun version detected: {tag}")
 
 
 class BaseConfig:
@@ -514,6 +608,7 @@ class BaseConfig:
         self.env_vars_opt = env_vars_opt
         self.simulate = simulate or is_dummy_mode
         self._env_dict = None
+        self._pending_env = {}
 
     @classmethod
     def from_config(cls, other_config):
@@ -527,17 +622,61 @@ class BaseConfig:
         return config
 
     def get_env(self, refresh=False):
-        if not self._env_dict or refresh:
-            self._env_dict = dotenv.dotenv_values(self.filename)
+        if self._env_dict and not refresh:
+            return self._env_dict
+        try:
+            cache_key = (self.filename, os.stat(self.filename).st_mtime_ns)
+        except OSError:
+            cache_key = (self.filename, 0)
+        cached = _env_cache.get(cache_key)
+        if cached is None or refresh:
+            import dotenv
+
+            cached = dict(dotenv.dotenv_values(self.filename))
+            _env_cache[cache_key] = cached
+        self._env_dict = cached
         return self._env_dict
 
+    def defer_env(self, env_vars):
+        # buffer settings in memory, written in one pass by flush_env
+        self._pending_env.update(env_vars)
+
+    def flush_env(self):
+        if self._pending_env:
+            pending, self._pending_env = self._pending_env, {}
+            self.set_env(pending)
+
+    def _bulk_set(self, updates):
+        # read + parse the file once and write all keys in a single pass
+        # (dotenv.set_key re-parses and rewrites the whole file per key)
+        import dotenv
+
+        env = dict(dotenv.dotenv_values(self.filename))
+        env.update(updates)
+        self._write_env_file(env)
+
+    def _write_env_file(self, env):
+        # write to a temp file and replace, so a crash cannot leave a torn file
+        dirname = os.path.dirname(self.filename) or "."
+        with tempfile.NamedTemporaryFile(
+            "w", dir=dirname, delete=False, suffix=".env"
+        ) as fp:
+            fp.writelines(f"{key}={value or ''}\n" for key, value in env.items())
+        os.replace(fp.name, self.filename)
+        self._drop_env_cache()
+
+    def _drop_env_cache(self):
+        for cache_key in [key for key in _env_cache if key[0] == self.filename]:
+            del _env_cache[cache_key]
+        self._env_dict = None
+
     def set_env(self, env_vars):
-        for key, value in env_vars.items():
-            if value is not None:
-                dotenv.set_key(self.filename, key, str(value), quote_mode="")
+        updates = {
+            key: str(value) for key, value in env_vars.items() if value is not None
+        }
         if self.env_vars_opt:
-            for key, value in _list2dict(self.env_vars_opt).items():
-                dotenv.set_key(self.filename, key, value, quote_mode="")
+            updates.update(_list2dict(self.env_vars_opt))
+        self._bulk_set(updates)
         if self.env_file:
             env_file = self.env_file
             # if its not the default file print the usage details
@@ -551,42 +690,63 @@ class BaseConfig:
             if delete_file:
                 print(f"deleting env file {self.filename}")
                 os.remove(self.filename)
+                self._drop_env_cache()
             else:
+                import dotenv
+
+                env = dict(dotenv.dotenv_values(self.filename))
                 for key in [
                     "MLRUN_DBPATH",
                     "MLRUN_CONF_LAST_DEPLOYMENT",
                     "MLRUN_MOCK_NUCLIO_DEPLOYMENT",
                 ] + (delete_keys or []):
-                    dotenv.unset_key(self.filename, key)
+                    env.pop(key, None)
+                self._write_env_file(env)
         else:
             print(f".env file {self.filename} not found")
 
-    def do_popen(self, cmd, env=None, interactive=True, stdin=None):
+    def do_popen(
+        self, cmd, env=None, interactive=True, stdin=None, input_data=None, quiet=False
+    ):
         if self.simulate:
             print(f"DUMMY: {' '.join(cmd)}")
             return 0, "", ""
 
-        output = None if interactive else subprocess.PIPE
+        # resolve the binary through the cached PATH lookup, so repeated
+        # spawns of kubectl/helm/docker skip the per-exec PATH walk
+        cmd = [_which(cmd[0]) or cmd[0], *cmd[1:]]
         stdin = None if not stdin else stdin
         if self.verbose:
             print(cmd)
         try:
-            child = subprocess.Popen(
-                cmd, env=env, stdin=stdin, stdout=output, stderr=output
+            if interactive and input_data is None:
+                # quiet discards output, for probes where only the exit
+                # code matters (no pipes to drain, no terminal noise)
+                output = subprocess.DEVNULL if quiet else None
+                child = subprocess.Popen(
+                    cmd, env=env, stdin=stdin, stdout=output, stderr=output
+                )
+                return child.wait(), "", ""
+
+            # capture_output drains stdout/stderr concurrently, so a child
+            # writing more than a pipe buffer (e.g. helm) cannot deadlock
+            result = subprocess.run(
+                cmd,
+                env=env,
+                stdin=stdin if input_data is None else None,
+                input=input_data,
+                capture_output=True,
+                check=False,
             )
         except FileNotFoundError as exc:
             if interactive or self.verbose:
                 print(str(exc))
             return 99, "", ""
 
-        returncode = child.wait()
-        if interactive:
-            return returncode, "", ""
-
         return (
-            returncode,
-            child.stdout.read().decode("utf-8"),
-            child.stderr.read().decode("utf-8"),
+            result.returncode,
+            result.stdout.decode("utf-8"),
+            result.stderr.decode("utf-8"),
         )
 
     def start(self, **kwargs):
@@ -624,11 +784,11 @@ class LocalConfig(BaseConfig):
             return sys.executable
 
         python_exec = os.environ.get("PYTHON_EXEC")
-        if python_exec and shutil.which(python_exec):
+        if python_exec and _which(python_exec):
             return python_exec
 
         for executable in ["python3", "python"]:
-            if shutil.which(executable):
+            if _which(executable):
                 return executable
 
         print(
@@ -706,11 +866,18 @@ class LocalConfig(BaseConfig):
             prefix = ["conda" "run" "-n", conda_env, "python"]
 
         if not installed:
-            # check if mlrun + api packages are installed
-            returncode, _, _ = self.do_popen(
-                prefix + ["-c", "import mlrun, apscheduler, uvicorn"], interactive=False
-            )
-            installed = returncode == 0
+            if not conda_env and self.find_python_exec() == sys.executable:
+                # install targets this very interpreter, check its packages
+                # in-process without forking a new one
+                installed = self._api_packages_installed()
+            else:
+                # a conda env or another interpreter (PYTHON_EXEC, frozen
+                # binary): its packages arent ours, probe via a subprocess
+                returncode, _, _ = self.do_popen(
+                    prefix + ["-c", "import mlrun, apscheduler, uvicorn"],
+                    interactive=False,
+                )
+                installed = returncode == 0
 
         if not installed:
             package = "mlrun[api]"
@@ -721,6 +888,17 @@ class LocalConfig(BaseConfig):
             if returncode != 0:
                 print(err)
 
+    @staticmethod
+    def _api_packages_installed():
+        from importlib.metadata import PackageNotFoundError, distribution
+
+        try:
+            for package in ["mlrun", "apscheduler", "uvicorn"]:
+                distribution(package)
+            return True
+        except PackageNotFoundError:
+            return False
+
     @staticmethod
     def pid_exists(pid):
         """Check whether pid exists in the current process table."""
@@ -733,15 +911,19 @@ class LocalConfig(BaseConfig):
 
 class DockerConfig(BaseConfig):
     def is_supported(self, print_error=False):
+        probe_key = ("docker",)
+        if probe_key in _probe_cache:
+            return _probe_cache[probe_key]
         for executable in ["docker", "docker-compose"]:
-            if shutil.which(executable) is None:
+            if _which(executable) is None:
                 if print_error or self.verbose:
                     print(
                         f"Error, {executable} executable was not found"
                         ", please make sure it is installed and accessible"
                     )
                 return False
-        docker_runs = self.do_popen(["docker", "ps"])[0] == 0
+        docker_runs = self.do_popen(["docker", "ps"], quiet=True)[0] == 0
+        _probe_cache[probe_key] = docker_runs
         if not docker_runs and (print_error or self.verbose):
             print("docker process failed to execute")
         if self.verbose and docker_runs:
@@ -787,25 +969,25 @@ class DockerConfig(BaseConfig):
         if not foreground:
             cmd += ["-d"]
 
-        compose_body = compose_template + mlrun_api_template
-
         jupyter_image = ""
         if not jupyter and "jupyter" in options:
             jupyter = "."
         if jupyter:
-            compose_body += jupyter_template
             jupyter_image = f"mlrun/jupyter:{tag}" if jupyter == "." else jupyter
             logging.info(f"Jupyter container image: {jupyter_image} ")
 
-        if "milvus" in options:
-            compose_body += milvus_template
-
-        if "mysql" in options:
-            compose_body += mysql_template
-
-        compose_body += suffix_template
-        with open(compose_file, "w") as fp:
-            fp.write(compose_body)
+        if "milvus" in options or "mysql" in options:
+            compose_body = _compose_body_base
+            if jupyter:
+                compose_body += jupyter_template
+            if "milvus" in options:
+                compose_body += milvus_template
+            if "mysql" in options:
+                compose_body += mysql_template
+            compose_body += suffix_template
+        else:
+            # use the variants pre-assembled at import time
+            compose_body = _compose_body_jupyter if jupyter else _compose_body_plain
 
         env = os.environ.copy()
         conf_env = {}
@@ -822,6 +1004,19 @@ class DockerConfig(BaseConfig):
                 env[key] = val
                 conf_env[key] = val
 
+        # hash the compose body together with the env vars it expands, so a
+        # re-run with identical settings can skip the compose reconciliation
+        compose_hash = hashlib.blake2b(
+            compose_body.encode() + json.dumps(conf_env, sort_keys=True).encode(),
+            digest_size=16,
+        ).hexdigest()
+        # a foreground run must always exec compose, so never skip it
+        unchanged = not foreground and self._compose_unchanged(
+            compose_file, compose_body, compose_hash
+        )
+        if not unchanged:
+            self._write_compose_file(compose_file, compose_body)
+
         path_map = None
         if volume_mount != docker_volume_mount:
             path_map == f"{docker_volume_mount}::{volume_mount}"
@@ -836,19 +1031,23 @@ class DockerConfig(BaseConfig):
             },
         )
 
-        print(cmd)
-        returncode, _, _ = self.do_popen(cmd, env=env)
-        if returncode != 0:
-            raise SystemExit(returncode)
+        if unchanged:
+            print("compose file and settings unchanged, skipping docker-compose up")
+        else:
+            print(cmd)
+            returncode, _, _ = self.do_popen(cmd, env=env)
+            if returncode != 0:
+                raise SystemExit(returncode)
+            # persist the hash only after a successful up, so a failed run
+            # never makes the next retry take the skip branch
+            self.set_env({"MLRUN_CONF_COMPOSE_HASH": compose_hash})
 
+        ui_port = os.environ.get("MLRUN_UI_PORT", "8060")
+        nuclio_port = os.environ.get("NUCLIO_PORT", "8070")
         print()
         print(f"MLRun API address:  http://localhost:{port} (internal: http://mlrun-api:{port})")
-        print(
-            f"MLRun UI address:   http://localhost:{os.environ.get('MLRUN_UI_PORT', '8060')}"
-        )
-        print(
-            f"Nuclio UI address:  http://localhost:{os.environ.get('NUCLIO_PORT', '8070')}"
-        )
+        print(f"MLRun UI address:   http://localhost:{ui_port}")
+        print(f"Nuclio UI address:  http://localhost:{nuclio_port}")
         if jupyter:
             print("Jupyter address:    http://localhost:8888")
         if "milvus" in options:
@@ -859,6 +1058,24 @@ class DockerConfig(BaseConfig):
             print(f"  From Containers: {mysql_connection_url}")
             print(f"  From host:       {mysql_connection_url.replace('sqldb', 'localhost')}")
 
+    def _compose_unchanged(self, compose_file, compose_body, compose_hash):
+        if self.get_env().get("MLRUN_CONF_COMPOSE_HASH", "") != compose_hash:
+            return False
+        try:
+            with open(compose_file, "r") as fp:
+                return fp.read() == compose_body
+        except OSError:
+            return False
+
+    @staticmethod
+    def _write_compose_file(compose_file, compose_body):
+        dirname = os.path.dirname(os.path.realpath(compose_file))
+        with tempfile.NamedTemporaryFile(
+            "w", dir=dirname, delete=False, suffix=".yaml"
+        ) as fp:
+            fp.write(compose_body)
+        os.replace(fp.name, compose_file)
+
     def stop(self, force=None, cleanup=None):
         compose_file = self.get_env().get("MLRUN_CONF_COMPOSE_PATH", "")
         compose_env = self.get_env().get("MLRUN_CONF_COMPOSE_ENV", "{}")
@@ -873,7 +1090,8 @@ class DockerConfig(BaseConfig):
             if returncode != 0:
                 self.set_env({"MLRUN_DBPATH": ""})  # disable the DB access
                 raise SystemExit(returncode)
-        self.clear_env(cleanup)
+        # drop the compose hash so the next start doesnt skip docker-compose up
+        self.clear_env(cleanup, delete_keys=["MLRUN_CONF_COMPOSE_HASH"])
 
     def query_containers_by_filter(self, filters: dict) -> List[str]:
         cmd = ["docker", "ps", "-q"]
@@ -896,8 +1114,10 @@ class DockerConfig(BaseConfig):
         )
         if not containers:
             return
-        print(f"Stopping nuclio function containers: {' '.join(containers)}")
-        cmd = ["docker", "stop"] + containers
+        print(f"Removing nuclio function containers: {' '.join(containers)}")
+        # rm -f kills instead of waiting out the 10s SIGTERM grace period per
+        # container, and the docker daemon removes the batch in parallel
+        cmd = ["docker", "rm", "-f"] + containers
         returncode, _, err = self.do_popen(cmd, interactive=False)
         if returncode != 0:
             print(err)
@@ -905,21 +1125,32 @@ class DockerConfig(BaseConfig):
 
 class K8sConfig(BaseConfig):
     def is_supported(self, print_error=False):
-        if shutil.which("kubectl") is None:
+        kubeconfig = os.environ.get("KUBECONFIG") or os.path.expanduser(
+            "~/.kube/config"
+        )
+        try:
+            kubeconfig_mtime = os.stat(kubeconfig).st_mtime_ns
+        except OSError:
+            kubeconfig_mtime = 0
+        probe_key = ("kubectl", kubeconfig, kubeconfig_mtime)
+        if probe_key in _probe_cache:
+            return _probe_cache[probe_key]
+        if _which("kubectl") is None:
             if print_error or self.verbose:
                 logging.error(
                     "Error, kubectl was not found, "
                     "please make sure Kubernetes is installed and configured"
                 )
             return False
-        if shutil.which("helm") is None:
+        if _which("helm") is None:
             if print_error or self.verbose:
                 logging.error(
                     "Error, helm was not found, please make sure helm is installed"
                     " see: https://helm.sh/docs/intro/install/"
                 )
             return False
-        kubectl_runs = self.do_popen(["kubectl", "version"])[0] == 0
+        kubectl_runs = self.do_popen(["kubectl", "version"], quiet=True)[0] == 0
+        _probe_cache[probe_key] = kubectl_runs
         if not kubectl_runs and (print_error or self.verbose):
             logging.error("Kubernetes cli (kubectl) is not accessible")
         if self.verbose and kubectl_runs:
@@ -939,6 +1170,8 @@ class K8sConfig(BaseConfig):
         chart_ver=None,
         values_file_path=None,
         jupyter="",
+        pre_pull=False,
+        async_install=False,
         **kwargs,
     ):
         logging.info("Start installing MLRun CE")
@@ -948,28 +1181,44 @@ class K8sConfig(BaseConfig):
         logging.info(f"Using MLRun tag: {tag} ")
         logging.info(f"Creating kubernetes namespace {namespace}...")
         create_namespace = True
-        if self.check_k8s_resource_exist("namespace", namespace):
-            if  "MLSETUP_NONINTERACTIVE" not in os.environ:
-                logging.warning(f"Namespace {namespace} already exists")
-                text = click.prompt(
-                    "To overwrite the existing namespace press y or Y",
-                    type=str,
-                    default="n",
+        if "MLSETUP_NONINTERACTIVE" in os.environ:
+            # no overwrite prompt wanted, so skip the separate existence check
+            # and create/keep the namespace in a single idempotent apply
+            manifest = (
+                f"apiVersion: v1\nkind: Namespace\nmetadata:\n  name: {namespace}\n"
+            )
+            returncode, out, err = self.do_popen(
+                ["kubectl", "apply", "-f", "-"],
+                interactive=False,
+                input_data=manifest.encode(),
+            )
+            if returncode != 0:
+                logging.error(err)
+                raise SystemExit(returncode)
+            create_namespace = False
+        elif self.check_k8s_resource_exist("namespace", namespace):
+            logging.warning(f"Namespace {namespace} already exists")
+            text = click.prompt(
+                "To overwrite the existing namespace press y or Y",
+                type=str,
+                default="n",
+            )
+            text = text.lower()
+            if "y" in text:
+                returncode, out, err = self.do_popen(
+                    ["kubectl", "delete", "namespace", namespace], interactive=False
                 )
-                text = text.lower()
-                if "y" in text:
-                    returncode, out, err = self.do_popen(
-                        ["kubectl", "delete", "namespace", namespace], interactive=False
-                    )
-                    if returncode != 0:
-                        logging.error(err)
-                        raise SystemExit(returncode)
-                else:
-                    create_namespace = False
+                self.forget_k8s_resource("namespace", namespace)
+                if returncode != 0:
+                    logging.error(err)
+                    raise SystemExit(returncode)
+            else:
+                create_namespace = False
         if create_namespace:
             returncode, out, err = self.do_popen(
                 ["kubectl", "create", "namespace", namespace], interactive=True
             )
+            self.forget_k8s_resource("namespace", namespace)
             if returncode != 0:
                 # err = child.stderr.read().decode("utf-8")
                 if "AlreadyExists" not in err:
@@ -982,117 +1231,161 @@ class K8sConfig(BaseConfig):
             "MLRUN_CONF_K8S_NAMESPACE": namespace,
             "MLRUN_CONF_K8S_STAGE": K8sStages.namespace,
         }
-        self.set_env(env_settings)
+        self.defer_env(env_settings)
 
-        # Install and update Helm charts
-        helm_commands = [
-            ["helm", "repo", "add", "mlrun-ce", "https://mlrun.github.io/ce"],
-            ["helm", "repo", "list"],
-            ["helm", "repo", "update"],
-        ]
+        try:
 
-        logging.info("Installing and updating mlrun helm repo")
-        for command in helm_commands:
-            returncode, _, _ = self.do_popen(command)
-            if returncode != 0:
-                raise SystemExit(returncode)
-        env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.helm
-        self.set_env(env_settings)
+            # Install and update Helm charts
+            # 'repo add' and 'repo list' are independent, run them concurrently,
+            # 'repo update' must only run once the repo was added
+            logging.info("Installing and updating mlrun helm repo")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                add_future = executor.submit(
+                    self.do_popen,
+                    ["helm", "repo", "add", "mlrun-ce", "https://mlrun.github.io/ce"],
+                )
+                # repo list is informational only: it exits 1 when no repos
+                # are configured yet (e.g. a first install racing repo add),
+                # so dont treat its status as fatal
+                list_future = executor.submit(self.do_popen, ["helm", "repo", "list"])
+                returncode, _, _ = add_future.result()
+                if returncode != 0:
+                    raise SystemExit(returncode)
+                update_future = executor.submit(self.do_popen, ["helm", "repo", "update"])
+                list_future.result()
+                returncode, _, _ = update_future.result()
+                if returncode != 0:
+                    raise SystemExit(returncode)
+            env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.helm
+            self.defer_env(env_settings)
 
-        # create or get docker registry settings
-        registry_url, pull_secret, push_secret, new_settings = self.configure_registry(
-            namespace, registry_args
-        )
-        env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.registry
-        for setting, value in new_settings.items():
-            env_settings["MLRUN_CONF_K8S_" + setting] = value
-        self.set_env(env_settings)
-
-        # run helm to install mlrun
-        helm_run_cmd = [
-            "helm",
-            "--namespace",
-            namespace,
-            "install",
-            name,
-            "--wait",
-            "--timeout",
-            "960s",
-            "--set",
-            f"global.registry.url={registry_url}",
-        ]
-        if pull_secret:
-            helm_run_cmd += ["--set", f"global.registry.secretName={pull_secret}"]
-        if push_secret:
-            helm_run_cmd += [
-                "--set",
-                f"nuclio.dashboard.kaniko.registryProviderSecretName={push_secret}",
-                "--set",
-                f"mlrun.defaultDockerRegistrySecretName={push_secret}",
-            ]
-        if external_addr:
-            helm_run_cmd += ["--set", f"global.externalHostAddress={external_addr}"]
-        if jupyter:
-            tag_jupyter = None
-            if ":" in jupyter:
-                tag_jupyter = jupyter.split(":")[-1]
-                jupyter = jupyter.split(":")[0]
-            logging.info(
-                f'Jupyter container image: {jupyter}:{tag_jupyter or "latest"} '
+            # create or get docker registry settings
+            registry_url, pull_secret, push_secret, new_settings = self.configure_registry(
+                namespace, registry_args
             )
-            helm_run_cmd += [
-                "--set",
-                f"jupyterNotebook.image.repository={jupyter}",
-            ]
-            helm_run_cmd += [
-                "--set",
-                f'jupyterNotebook.image.tag={tag_jupyter if tag_jupyter else "latest"}',
+            env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.registry
+            env_settings.update(
+                {f"MLRUN_CONF_K8S_{key}": value for key, value in new_settings.items()}
+            )
+            self.defer_env(env_settings)
+
+            # run helm to install mlrun
+            # collect every --set override first, then extend the command once
+            sets = [f"global.registry.url={registry_url}"]
+            if pull_secret:
+                sets.append(f"global.registry.secretName={pull_secret}")
+            if push_secret:
+                sets.append(
+                    f"nuclio.dashboard.kaniko.registryProviderSecretName={push_secret}"
+                )
+                sets.append(f"mlrun.defaultDockerRegistrySecretName={push_secret}")
+            if external_addr:
+                sets.append(f"global.externalHostAddress={external_addr}")
+            if jupyter:
+                tag_jupyter = None
+                if ":" in jupyter:
+                    tag_jupyter = jupyter.split(":")[-1]
+                    jupyter = jupyter.split(":")[0]
+                logging.info(
+                    f'Jupyter container image: {jupyter}:{tag_jupyter or "latest"} '
+                )
+                sets.append(f"jupyterNotebook.image.repository={jupyter}")
+                sets.append(
+                    f'jupyterNotebook.image.tag={tag_jupyter if tag_jupyter else "latest"}'
+                )
+            images_service = (
+                ["mlrun.api", "mlrun.ui", "jupyterNotebook"]
+                if not jupyter
+                else ["mlrun.api", "mlrun.ui"]
+            )
+            if tag:
+                sets.extend(f"{service}.image.tag={tag}" for service in images_service)
+            sets.extend(service_options)
+
+            helm_run_cmd = [
+                "helm",
+                "--namespace",
+                namespace,
+                "install",
+                name,
             ]
-        images_service = (
-            ["mlrun.api", "mlrun.ui", "jupyterNotebook"]
-            if not jupyter
-            else ["mlrun.api", "mlrun.ui"]
-        )
-        if tag:
-            for service in images_service:
-                helm_run_cmd += ["--set", f"{service}.image.tag={tag}"]
-        if settings:
-            for setting in settings:
-                helm_run_cmd += ["--set", setting]
-        for opt in service_options:
-            helm_run_cmd += ["--set", opt]
-        if chart_ver:
-            helm_run_cmd += ["--version", chart_ver]
-
-        if values_file_path:
-            helm_run_cmd += ["-f", values_file_path]
+            # helm --wait polls the release in-process for up to 16 minutes;
+            # with the python client available we stream readiness events
+            # over one watch connection instead, and --async skips waiting
+            # altogether
+            watch_ready = (
+                not async_install and not self.simulate and _k8s_api() is not None
+            )
+            if not async_install and not watch_ready:
+                helm_run_cmd += ["--wait", "--timeout", "960s"]
+            # batch the generated overrides into one values file so helm
+            # parses a single tree instead of merging dozens of --set flags;
+            # user-provided --set options stay as --set to keep their
+            # semantics and precedence
+            with tempfile.NamedTemporaryFile(
+                "w", prefix="mlrun-overrides-", suffix=".yaml", delete=False
+            ) as values_tmp:
+                values_tmp.write(_sets_to_values_yaml(sets))
+            helm_run_cmd.extend(
+                arg for kv in settings or [] for arg in ("--set", kv)
+            )
+            if chart_ver:
+                helm_run_cmd += ["--version", chart_ver]
 
-        if self.verbose:
-            helm_run_cmd += ["--debug"]
+            if values_file_path:
+                helm_run_cmd += ["-f", values_file_path]
+            # last -f wins in helm, keep the generated overrides after the
+            # user values file so they beat it, like the --set flags they
+            # replaced (user --set options still rank above any file)
+            helm_run_cmd += ["--values", values_tmp.name]
 
+            if self.verbose:
+                helm_run_cmd += ["--debug"]
 
-        helm_run_cmd += ["mlrun-ce/mlrun-ce"]
+            helm_run_cmd += ["mlrun-ce/mlrun-ce"]
 
-        logging.info("Running helm install...")
-        returncode, _, _ = self.do_popen(helm_run_cmd)
-        if returncode != 0:
-            raise SystemExit(returncode)
+            if pre_pull:
+                self.pre_pull_images(helm_run_cmd)
 
-        dbpath = f"http://{external_addr or 'localhost'}:{30070}"
-        env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.done
-        env_settings["MLRUN_DBPATH"] = dbpath
-        print(
-            "configure your mlrun client environment to use the installed service:\n"
-            f"mlrun config set -a {dbpath}"
-        )
-        self.set_env(env_settings)
+            logging.info("Running helm install...")
+            returncode, _, _ = self.do_popen(helm_run_cmd)
+            if returncode != 0:
+                # keep the values file around for debugging a failed install
+                raise SystemExit(returncode)
+            os.remove(values_tmp.name)
+
+            if watch_ready:
+                self.wait_ready(namespace)
+            elif async_install:
+                logging.info(
+                    "install submitted, watch the progress with: "
+                    f"kubectl -n {namespace} get pods"
+                )
+
+            dbpath = f"http://{external_addr or 'localhost'}:{30070}"
+            env_settings["MLRUN_CONF_K8S_STAGE"] = K8sStages.done
+            env_settings["MLRUN_DBPATH"] = dbpath
+            print(
+                "configure your mlrun client environment to use the installed service:\n"
+                f"mlrun config set -a {dbpath}"
+            )
+            self.defer_env(env_settings)
+        finally:
+            # write the stage we reached (also on failure) in a single pass
+            self.flush_env()
 
     @staticmethod
     def parse_services(include, enable):
         extra_sets = []
         if include:
             for service in include:
-                match = _partial_match(service, k8s_services)
+                # exact names hit the frozenset, abbreviations fall back to
+                # the prefix scan
+                match = (
+                    service
+                    if service in _k8s_services_set
+                    else _partial_match(service, k8s_services)
+                )
                 extra_sets.append(service_map[match] + f".enabled={enable}")
         return extra_sets
 
@@ -1132,6 +1425,10 @@ class K8sConfig(BaseConfig):
                 returncode, _, _ = self.do_popen(cmd)
                 if returncode != 0:
                     raise SystemExit(returncode)
+                # docker run -d returns before the registry binds its port,
+                # wait for the listener so the following pushes/pulls dont
+                # race it into a long helm retry backoff
+                self.wait_for_port("localhost", 5000)
                 new_settings["DOCKER_REGISTRY"] = "docker-registry"
                 url = f"{_get_ip()}:5000"
 
@@ -1146,14 +1443,28 @@ class K8sConfig(BaseConfig):
             return url, pull_secret, push_secret, new_settings
 
         # create secret for pull registry
+        config_username = config_password = None
+        if not (
+            registry_args.get("username")
+            or registry_args.get("password")
+            or os.environ.get("DOCKER_USERNAME")
+            or os.environ.get("DOCKER_PASSWORD")
+        ):
+            # reuse credentials saved by `docker login` before falling back
+            # to an interactive prompt
+            config_username, config_password = _load_docker_config(
+                registry_service or "https://index.docker.io/v1/"
+            )
         registry_username = (
             registry_args.get("username")
             or os.environ.get("DOCKER_USERNAME")
+            or config_username
             or click.prompt("Docker registry username", type=str)
         )
         registry_password = (
             registry_args.get("password")
             or os.environ.get("DOCKER_PASSWORD")
+            or config_password
             or click.prompt("Docker registry password", type=str, hide_input=True)
         )
         registry_email = registry_args.get("email")
@@ -1188,34 +1499,148 @@ class K8sConfig(BaseConfig):
             registry_email,
         ]
         new_settings["REGISTRY_SECRET"] = pull_secret
-        create_secret = True
-        if self.check_k8s_resource_exist(
-            namespace=namespace, resource="secret", name=pull_secret
-        ):
-            logging.warning(f"Registry Secret {pull_secret} already exists")
-            if  "MLSETUP_NONINTERACTIVE" not in os.environ:
-                text = click.prompt(
-                    "To overwrite the existing Registry Secret press y or Y",
-                    type=str,
-                    default="n",
-                )
-                text = text.lower()
-                if "y" in text:
-                    returncode, _, _ = self.do_popen(
-                        ["kubectl", "-n", namespace, "delete", "secret", pull_secret]
-                    )
-                    if returncode != 0:
-                        raise SystemExit(returncode)
-                else:
-                    create_secret = False
-        if create_secret:
-            returncode, _, _ = self.do_popen(docker_secret_cmd)
-            if returncode != 0:
-                logging.error("Failed to create secret !")
-                raise SystemExit(returncode)
+        # render the secret client-side and server-side apply it: a single
+        # atomic API round trip which creates or overwrites the secret, so
+        # no exists-check/delete/recreate sequence (and no TOCTOU window)
+        returncode, manifest, err = self.do_popen(
+            docker_secret_cmd + ["--dry-run=client", "-o", "yaml"],
+            interactive=False,
+        )
+        if returncode != 0:
+            logging.error(f"Failed to render secret ! {err}")
+            raise SystemExit(returncode)
+        returncode, _, err = self.do_popen(
+            [
+                "kubectl",
+                "-n",
+                namespace,
+                "apply",
+                "--server-side",
+                "--force-conflicts",
+                "-f",
+                "-",
+            ],
+            interactive=False,
+            input_data=manifest.encode(),
+        )
+        self.forget_k8s_resource("secret", pull_secret, namespace)
+        if returncode != 0:
+            logging.error(f"Failed to create secret ! {err}")
+            raise SystemExit(returncode)
 
         return url, pull_secret, push_secret, new_settings
 
+    def wait_for_port(self, host, port, timeout=15):
+        if self.simulate:
+            return True
+        import socket
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            s = socket.socket()
+            s.settimeout(0.5)
+            try:
+                s.connect((host, port))
+                return True
+            except OSError:
+                time.sleep(0.5)
+            finally:
+                s.close()
+        logging.warning(f"timed out waiting for {host}:{port} to accept connections")
+        return False
+
+    def wait_ready(self, namespace, timeout=960):
+        # replaces helm --wait: follow the namespace workloads over a single
+        # watch stream per kind until every one reports ready, instead of a
+        # poll loop against the api server
+        from kubernetes import watch
+
+        logging.info("Waiting for the services to become ready...")
+        apps = _k8s_api().AppsV1Api()
+
+        def _is_ready(item):
+            return (item.status.ready_replicas or 0) >= (item.spec.replicas or 0)
+
+        deadline = time.time() + timeout
+        for lister in (
+            apps.list_namespaced_deployment,
+            apps.list_namespaced_stateful_set,
+        ):
+            done = False
+            while not done and time.time() < deadline:
+                # (re-)list on every connect: watch connections routinely
+                # drop over a long wait (stale resourceVersion, proxies,
+                # api-server restarts), so treat any stream error as a cue
+                # to re-sync and keep watching until the deadline
+                try:
+                    ready = {
+                        item.metadata.name: _is_ready(item)
+                        for item in lister(namespace).items
+                    }
+                    if all(ready.values()):
+                        done = True
+                        break
+                    watcher = watch.Watch()
+                    for event in watcher.stream(
+                        lister,
+                        namespace,
+                        timeout_seconds=max(int(deadline - time.time()), 1),
+                    ):
+                        obj = event["object"]
+                        if event["type"] == "DELETED":
+                            ready.pop(obj.metadata.name, None)
+                        else:
+                            ready[obj.metadata.name] = _is_ready(obj)
+                        if all(ready.values()):
+                            done = True
+                            watcher.stop()
+                            break
+                except Exception as exc:
+                    logging.debug(f"watch connection dropped, retrying: {exc}")
+                    time.sleep(2)
+            if not done:
+                # match helm --wait semantics: a not-ready install is a
+                # failed install, dont fall through to the success path
+                logging.error(
+                    f"timed out after {timeout}s waiting for services in "
+                    f"namespace {namespace} to become ready"
+                )
+                raise SystemExit(1)
+
+    def pre_pull_images(self, helm_run_cmd):
+        # render the chart and pull its images in parallel to the local
+        # docker daemon, so helm install --wait doesnt block on slow
+        # sequential pulls inside the pods
+        if _which("docker") is None:
+            logging.warning("docker executable not found, skipping image pre-pull")
+            return
+        template_cmd = ["helm", "template", "mlrun-ce/mlrun-ce"]
+        take_value = False
+        for arg in helm_run_cmd:
+            if arg in ("--set", "--version", "-f", "--values"):
+                template_cmd.append(arg)
+                take_value = True
+            elif take_value:
+                template_cmd.append(arg)
+                take_value = False
+        returncode, out, _ = self.do_popen(template_cmd, interactive=False)
+        if returncode != 0:
+            logging.warning("helm template failed, skipping image pre-pull")
+            return
+        images = sorted(set(_image_re.findall(out)))
+        if not images:
+            return
+        logging.info(f"Pre-pulling {len(images)} container images...")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(
+                executor.map(
+                    lambda image: self.do_popen(
+                        ["docker", "pull", image], interactive=False
+                    ),
+                    images,
+                )
+            )
+
     def pause(self):
         env = self.get_env()
         namespace = env.get("MLRUN_CONF_K8S_NAMESPACE", "")
@@ -1232,16 +1657,31 @@ class K8sConfig(BaseConfig):
     def scale(self, services: dict = None):
         env = self.get_env()
         namespace = env.get("MLRUN_CONF_K8S_NAMESPACE", "")
-        deployments = services.keys() if services else scaled_deplyoments
-        for deployment in deployments:
-            cmd = ["kubectl", "-n", namespace, "scale", "deployments.apps"]
-            cmd.append(deployment)
-            replica_num = services.get(deployment, "1")
-            cmd.append(f"--replicas={replica_num}")
-            returncode, _, _ = self.do_popen(cmd)
+        services = services or {deployment: "1" for deployment in scaled_deplyoments}
+        # group by replica count so a uniform scale is a single kubectl call,
+        # and scale heterogeneous groups concurrently
+        groups = collections.defaultdict(list)
+        for deployment, replicas in services.items():
+            groups[replicas].append(deployment)
+
+        def scale_group(group):
+            replicas, deployments = group
+            cmd = (
+                ["kubectl", "-n", namespace, "scale", "deployments.apps"]
+                + deployments
+                + [f"--replicas={replicas}"]
+            )
+            return self.do_popen(cmd)[0]
+
+        if len(groups) == 1:
+            returncodes = [scale_group(next(iter(groups.items())))]
+        else:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                returncodes = list(executor.map(scale_group, groups.items()))
+        for returncode in returncodes:
             if returncode != 0:
                 raise SystemExit(returncode)
-        self.check_scale(method="scale", namespace=namespace)
+        self.check_scale(method="scale", namespace=namespace, services=services)
 
     def stop(self, force=None, cleanup=None):
         env = self.get_env()
@@ -1265,12 +1705,15 @@ class K8sConfig(BaseConfig):
 
             self.set_env({"MLRUN_CONF_K8S_STAGE": str(K8sStages.registry)})
 
+        # the remaining cleanup commands are independent of each other
+        # (namespace deletion also cascades to its pods), run them together
+        cleanup_commands = []
         if cleanup and stage >= K8sStages.registry:
             # remove the registry service and/or secrets
             pull_secret = env.get("MLRUN_CONF_K8S_REGISTRY_SECRET", "")
             registry = env.get("MLRUN_CONF_K8S_DOCKER_REGISTRY", "")
             if pull_secret:
-                returncode, _, _ = self.do_popen(
+                cleanup_commands.append(
                     [
                         "kubectl",
                         "--namespace",
@@ -1281,94 +1724,140 @@ class K8sConfig(BaseConfig):
                     ]
                 )
             if registry:
-                self.do_popen(["docker", "rm", "-f", registry])
+                cleanup_commands.append(["docker", "rm", "-f", registry])
 
         if cleanup and stage >= K8sStages.namespace:
-            # delete pods and the namespace
-            self.do_popen(
-                [
-                    "kubectl",
-                    "--namespace",
-                    namespace,
-                    "delete",
-                    "pod",
-                    "--force",
-                    "--grace-period=0",
-                    "--all",
-                ]
-            )
-            self.do_popen(["kubectl", "delete", "namespace", namespace])
+            cleanup_commands.append(["kubectl", "delete", "namespace", namespace])
+
+        if cleanup_commands:
+            with ThreadPoolExecutor(max_workers=len(cleanup_commands)) as executor:
+                list(executor.map(self.do_popen, cleanup_commands))
 
         self.clear_env(cleanup, delete_keys=delete_keys)
 
-    def check_scale(self, method, namespace, services=None):
-        i_scale = "1" if method == "scale" else "0"
+    def check_scale(self, method, namespace, services=None, timeout=300):
+        deployments = list(services.keys()) if services else scaled_deplyoments
+        if method == "scale":
+            # rollout status blocks server-side until the deployment is
+            # available, no client-side polling needed
+            for deployment in deployments:
+                self.do_popen(
+                    [
+                        "kubectl",
+                        "-n",
+                        namespace,
+                        "rollout",
+                        "status",
+                        "deployment",
+                        deployment,
+                        f"--timeout={timeout}s",
+                    ]
+                )
+            return
 
         # todo: support check scale for more then one replica
-        def check_scale_status(i_scale, namespace):
-            cmd = ["kubectl", "-n", namespace, "get", "deployments.apps"]
-            if self.simulate:
-                print(f"DUMMY: {' '.join(cmd)}")
-                return 0, "", ""
-            if self.verbose:
-                print(cmd)
-            child = subprocess.Popen(
-                cmd,
-                env=None,
-                stdin=None,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            cmd = ["grep", "nuclio\|mlrun\|mpi"]
-            child = subprocess.Popen(
-                cmd,
-                env=None,
-                stdin=child.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            cmd = ["awk", "{print $4}"]
-            child = subprocess.Popen(
-                cmd,
-                env=None,
-                stdin=child.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            cmd = ["grep", i_scale]
-            child = subprocess.Popen(
-                cmd,
-                env=None,
-                stdin=child.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            cmd = ["wc", "-l"]
-            child = subprocess.Popen(
-                cmd,
-                env=None,
-                stdin=child.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+        # scale-to-zero has no rollout event to wait on, poll gently with a
+        # bounded sleep instead of busy-looping on the API server
+        deadline = time.time() + timeout
+        while self._count_deployments_at_scale(namespace, "0") < len(deployments):
+            if time.time() > deadline:
+                logging.warning(
+                    f"timed out after {timeout}s waiting for deployments to scale down"
+                )
+                return
+            time.sleep(2)
+
+    def _count_deployments_at_scale(self, namespace, i_scale):
+        api = None if self.simulate else _k8s_api()
+        if api is not None:
+            try:
+                deployments = api.AppsV1Api().list_namespaced_deployment(namespace).items
+            except api.exceptions.ApiException:
+                return 0
+            return sum(
+                1
+                for deployment in deployments
+                if _scaled_deployment_re.search(deployment.metadata.name)
+                and str(deployment.status.available_replicas or 0) == i_scale
             )
-            return int(child.stdout.read().decode("utf-8"))
 
-        stop = check_scale_status(i_scale, namespace)
-        while stop < len(scaled_deplyoments):
-            stop = check_scale_status(i_scale, namespace)
+        # a single kubectl call parsed in python, instead of forking a
+        # kubectl | grep | awk | grep | wc pipeline per poll
+        cmd = [
+            "kubectl",
+            "-n",
+            namespace,
+            "get",
+            "deployments.apps",
+            "-o",
+            'jsonpath={range .items[*]}{.metadata.name}{"="}'
+            '{.status.availableReplicas}{"\\n"}{end}',
+        ]
+        returncode, out, _ = self.do_popen(cmd, interactive=False)
+        if self.simulate:
+            # pretend all deployments reached the requested scale
+            return len(scaled_deplyoments)
+        if returncode != 0:
+            return 0
+        count = 0
+        for line in out.splitlines():
+            name, _, available = line.partition("=")
+            # availableReplicas is omitted when the deployment is scaled to 0
+            if _scaled_deployment_re.search(name) and (available or "0") == i_scale:
+                count += 1
+        return count
 
     def check_k8s_resource_exist(self, resource: str, name: str, namespace: str = None):
+        cache_key = (resource, name, namespace)
+        if cache_key in _k8s_resource_cache:
+            return _k8s_resource_cache[cache_key]
+        api = None if self.simulate else _k8s_api()
+        if api is not None:
+            readers = {
+                "namespace": lambda: api.CoreV1Api().read_namespace(name),
+                "secret": lambda: api.CoreV1Api().read_namespaced_secret(
+                    name, namespace
+                ),
+            }
+            reader = readers.get(resource)
+            if reader is not None:
+                try:
+                    reader()
+                    exists = True
+                except api.exceptions.ApiException as exc:
+                    exists = exc.status != 404
+                _k8s_resource_cache[cache_key] = exists
+                return exists
         cmd = ["kubectl", "get", resource, name]
         if namespace:
             cmd = ["kubectl", "-n", namespace, "get", resource, name]
         returncode, out, err = self.do_popen(cmd, interactive=False)
-        if returncode == 1:
-            return False
-        else:
-            return True
+        exists = returncode != 1
+        _k8s_resource_cache[cache_key] = exists
+        return exists
+
+    @staticmethod
+    def forget_k8s_resource(resource: str, name: str, namespace: str = None):
+        # call after creating/deleting a resource so the next existence
+        # check is not answered from a stale cache entry
+        _k8s_resource_cache.pop((resource, name, namespace), None)
 
 
+@functools.lru_cache(maxsize=1)
 def _get_ip():
+    # the local address doesnt change during a run, avoid repeating the
+    # blocking socket dance when several code paths ask for it
+    import socket
+
+    try:
+        # prefer resolving the hostname, it avoids opening a socket at all
+        for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            ip = info[4][0]
+            if not ip.startswith("127."):
+                return ip
+    except OSError:
+        pass
+
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     s.settimeout(0)
     try:
@@ -1385,18 +1874,22 @@ def _get_ip():
 def _list2dict(lines: list, default_key="", default_value=None):
     out = {}
     for line in lines:
-        i = line.find("=")
-        if i == -1:
+        # partition scans the line once, vs find + two slices
+        key, sep, value = line.partition("=")
+        if not sep:
             line = line.strip()
             if line and default_key:
                 out[default_key] = line
             elif line and default_value is not None:
                 out[line] = default_value
             continue
-        key, value = line[:i].strip(), line[i + 1 :].strip()
-        if key is None:
+        key, value = key.strip(), value.strip()
+        if not key:
             raise ValueError("cannot find key in line (key=value)")
-        value = os.path.expandvars(value)
+        if "$" in value:
+            # expandvars recompiles its pattern internally, skip it when
+            # there is nothing to expand
+            value = os.path.expandvars(value)
         out[key] = value
     return out
 
@@ -1410,25 +1903,144 @@ def _partial_match(text, services):
     )
 
 
+def _load_docker_config(registry_server: str):
+    # pick up credentials stored by `docker login` (~/.docker/config.json),
+    # each auths entry holds base64(username:password) for its server
+    import base64
+
+    config_path = os.path.join(
+        os.environ.get("DOCKER_CONFIG") or os.path.expanduser("~/.docker"),
+        "config.json",
+    )
+    try:
+        with open(config_path) as fp:
+            auths = json.load(fp).get("auths", {})
+    except (OSError, ValueError):
+        return None, None
+
+    host = registry_server.split("://")[-1].split("/")[0]
+    for server, entry in auths.items():
+        if server != registry_server and server.split("://")[-1].split("/")[0] != host:
+            continue
+        auth = entry.get("auth")
+        if not auth:
+            continue
+        try:
+            username, _, password = base64.b64decode(auth).decode().partition(":")
+        except (ValueError, UnicodeDecodeError):
+            continue
+        if username and password:
+            logging.info(f"Using docker credentials from {config_path}")
+            return username, password
+    return None, None
+
+
+def _sets_to_values_yaml(sets: list):
+    # fold dotted helm override keys (a.b.c=v) into a nested values yaml;
+    # strings are emitted quoted so e.g. a '1.0' tag stays a string,
+    # true/false stay booleans to drive chart conditionals
+    root = {}
+    for entry in sets:
+        key, _, value = entry.partition("=")
+        node = root
+        parts = key.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+
+    lines = []
+
+    def emit(node, indent):
+        for key, value in node.items():
+            if isinstance(value, dict):
+                lines.append(f"{'  ' * indent}{key}:")
+                emit(value, indent + 1)
+            elif value in ("true", "false"):
+                lines.append(f"{'  ' * indent}{key}: {value}")
+            else:
+                lines.append(f"{'  ' * indent}{key}: {json.dumps(value)}")
+
+    emit(root, 0)
+    return "\n".join(lines) + "\n"
+
+
 def _docker_path(filepath: str):
-    if re.match(r"^[a-zA-Z]:\\.?", filepath):
+    if _win_drive_re.match(filepath):
         # convert windows paths to docker style
         filepath = "/" + filepath[0].lower() + filepath[2:].replace("\\", "/")
     return filepath
 
 
+_github_conn = None
+
+
+def _github_api_get(path, headers=None):
+    # reuse a single HTTPS connection across calls to skip repeated
+    # TCP+TLS handshakes (GitHub keeps the connection alive)
+    global _github_conn
+    import http.client
+
+    if _github_conn is None:
+        _github_conn = http.client.HTTPSConnection("api.github.com", timeout=10)
+    request_headers = {"User-Agent": "mlrun-setup"}
+    if headers:
+        request_headers.update(headers)
+    _github_conn.request("GET", path, headers=request_headers)
+    response = _github_conn.getresponse()
+    return response.status, response.read(), dict(response.getheaders())
+
+
+@functools.lru_cache(maxsize=1)
 def get_latest_mlrun_tag():
+    # the latest tag rarely changes, avoid an HTTPS round trip per command
+    # by caching the answer on disk for a short while (and per process);
+    # stale entries are revalidated with a cheap ETag conditional GET
+    cache_path = os.path.expanduser(tag_cache_file)
+    cached_tag, cached_etag, cache_fresh = "", "", False
+    try:
+        with open(cache_path) as fp:
+            cached = json.load(fp)
+        cached_tag = cached.get("tag", "")
+        cached_etag = cached.get("etag", "")
+        cache_fresh = time.time() - os.stat(cache_path).st_mtime < tag_cache_ttl
+    except (OSError, ValueError):
+        pass
+    if cached_tag and cache_fresh:
+        return cached_tag
+
     mlrun_releases = "https://api.github.com/repos/mlrun/mlrun/releases/latest"
     try:
-        with urllib.request.urlopen(mlrun_releases) as response:
-            data = response.read()
-            data = json.loads(data)
-            tag = data["tag_name"][1:]
-            print(f"latest MLRun version detected: {tag}")
-            return tag
+        headers = {"If-None-Match": cached_etag} if cached_etag else None
+        status, data, response_headers = _github_api_get(
+            "/repos/mlrun/mlrun/releases/latest", headers
+        )
+        if status == 304 and cached_tag:
+            # release unchanged, just refresh the cache freshness window
+            os.utime(cache_path)
+            return cached_tag
+        if status != 200:
+            raise RuntimeError(f"unexpected response status {status}")
+        data = json.loads(data)
+        tag = data["tag_name"][1:]
+        logging.debug(f"fetched latest MLRun tag: {tag}")
+        try:
+            with open(cache_path, "w") as fp:
+                json.dump({"tag": tag, "etag": response_headers.get("ETag", "")}, fp)
+        except OSError:
+            pass
+        return tag
     except Exception as exc:
         print(f"cant read mlrun releases from {mlrun_releases}, {exc}")
-    return ""
+    # fall back to a stale cached tag rather than nothing
+    return cached_tag
+
+
+def clear_mlrun_tag_cache():
+    get_latest_mlrun_tag.cache_clear()
+    try:
+        os.remove(os.path.expanduser(tag_cache_file))
+    except OSError:
+        pass
 
 
 compose_template = """
@@ -1619,6 +2231,12 @@ networks:
     name: mlrun
 """
 
+# pre-assemble the common compose bodies once at import time, the optional
+# milvus/mysql sections are still appended dynamically when requested
+_compose_body_base = compose_template + mlrun_api_template
+_compose_body_plain = _compose_body_base + suffix_template
+_compose_body_jupyter = _compose_body_base + jupyter_template + suffix_template
+
 
 deployment_modes = {
     "local": LocalConfig,